@@ -2,9 +2,9 @@
 app.py — Production Flask + Socket.IO restaurant ordering backend
 =================================================================
 Architecture
-  ├─ Blueprints:  tables_bp, orders_bp, stats_bp, admin_bp
-  ├─ Services:    emit_event(), parse_items()
-  ├─ Middleware:  structured logging, global error handlers
+  ├─ Blueprints:  tables_bp, menu_bp, orders_bp, stats_bp, admin_bp (+ bulk COPY I/O)
+  ├─ Services:    emit_event(), parse_items(), health prober, outbox dispatcher
+  ├─ Middleware:  structured logging, global error handlers, compression
   └─ Extensions:  JWT, Cache, CORS, SocketIO (eventlet)
 
 Performance highlights
@@ -13,6 +13,16 @@ Performance highlights
   • Partial index on (status, created_at) WHERE status='paid' for stats queries
   • Response-time logging via @app.before/after_request
   • Pool exhaustion surfaces a clean 503 instead of a 500 traceback
+  • Transactional outbox — order/table events commit with the change and are
+    broadcast by a LISTEN/NOTIFY-woken dispatcher, off the request path
+  • Idempotency-Key on POST /orders — retries replay the stored 201 from an
+    in-memory LRU without re-running the write path or re-broadcasting
+  • /health + /ready serve a background-probed snapshot — no pool checkout per probe
+  • Negotiated gzip/br/zstd compression for large JSON and CSV payloads
+  • /menu served from a precomputed snapshot; content-hash ETag + immutable
+    versioned URL; create_order reprices carts against its price index
+  • /stats/series + /stats/heatmap cache closed buckets for 30 days — only the
+    current open bucket is ever recomputed
 
 Scalability notes (500+ users)
   • Increase DB_POOL_MAX env var (default 15)
@@ -33,10 +43,12 @@ import json
 import time
 import logging
 import logging.config
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from zoneinfo import ZoneInfo
 
 # ── Third-party ───────────────────────────────────────────────────────────────
-from flask import Flask, Blueprint, request, jsonify, Response, g
+from flask import Flask, Blueprint, request, jsonify, Response, g, redirect, url_for
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required
 from flask_socketio import SocketIO
@@ -45,6 +57,16 @@ from flask_caching import Cache
 # ── Internal ──────────────────────────────────────────────────────────────────
 from database import db_conn, init_pool
 from init_db import initialize_database
+from compression import init_compression, cache_compressed
+import health
+import bulk_io
+import idempotency
+import outbox
+from invalidation import (
+    CACHE_TABLES, CACHE_ORDERS, CACHE_FINANCE, AGGREGATES,
+    history_generation, bump_history, enqueue_orders_imported,
+)
+from menu import current_snapshot, reload_snapshot, publish_snapshot, install_snapshot, price_order, MenuError
 
 
 # ════════════════════════════════════════════════════════════════════════════════
@@ -92,6 +114,8 @@ app.config.update(
     # ── Cache: swap for RedisCache in production with many dynos ──
     CACHE_TYPE=os.getenv("CACHE_TYPE", "SimpleCache"),
     CACHE_DEFAULT_TIMEOUT=5,
+    # Closed stats buckets are cached for weeks — leave room for them
+    CACHE_THRESHOLD=int(os.getenv("CACHE_THRESHOLD", 10000)),
     CACHE_REDIS_URL=os.getenv("REDIS_URL"),          # used only if CACHE_TYPE=RedisCache
     JSON_SORT_KEYS=False,
     PROPAGATE_EXCEPTIONS=True,
@@ -102,6 +126,14 @@ CORS(app, resources={r"/*": {"origins": FRONTEND_URL}}, supports_credentials=Tru
 jwt   = JWTManager(app)
 cache = Cache(app)
 
+# SimpleCache / NullCache live inside each worker process
+CACHE_SHARED = app.config["CACHE_TYPE"].rsplit(".", 1)[-1].lower() not in (
+    "simplecache", "simple", "nullcache", "null",
+)
+
+# gzip / br / zstd negotiated per request; compressed bytes cached per payload
+init_compression(app, cache)
+
 socketio = SocketIO(
     app,
     cors_allowed_origins=FRONTEND_URL,
@@ -114,9 +146,23 @@ socketio = SocketIO(
     engineio_logger=False,
 )
 
-# Initialise DB pool and schema once at startup
+# Initialise DB pool, schema and menu snapshot once at startup
 init_pool()
 initialize_database()
+reload_snapshot()
+
+# Health probes read a snapshot refreshed by a background green thread
+health.start_prober(socketio, cache)
+
+# Order/table events are written to the outbox in-transaction and fanned out here
+# (emit_event is defined below — the lambda resolves it at dispatch time)
+outbox.start_dispatcher(
+    socketio,
+    emit=lambda event, data: emit_event(event, data),
+    invalidate=lambda keys: cache.delete_many(*keys),
+    clear=cache.clear,
+    shared_cache=CACHE_SHARED,
+)
 
 
 # ════════════════════════════════════════════════════════════════════════════════
@@ -139,17 +185,77 @@ def emit_event(event: str, data: dict) -> None:
         logger.warning("Socket emit failed [%s]: %s", event, exc)
 
 
-# ── Cache key groups — invalidate by topic, not by hand ───────────────────────
-CACHE_TABLES  = ["all_tables"]
-CACHE_ORDERS  = ["all_orders"]
-CACHE_FINANCE = ["total_income", "stats_daily", "stats_monthly"]
-
-
 def bust(*groups):
+    """
+    Drop this process's cached keys right away (read-your-writes).
+    Order/table writes also enqueue the groups in the outbox, which
+    repeats the invalidation after commit — in every worker's cache.
+    """
     keys = [k for g in groups for k in g]
     cache.delete_many(*keys)
 
 
+# ── Time buckets — closed buckets are immutable and cached for a long time ────
+STATS_TZ = os.getenv("STATS_TIMEZONE", "Asia/Kolkata")
+_TZ      = ZoneInfo(STATS_TZ)
+
+# Finite, so entries orphaned by a generation bump age out of Redis too
+STATS_HISTORY_TTL = int(os.getenv("STATS_HISTORY_TTL", 30 * 24 * 3600))
+
+_BUCKET_STEP = {"hour": "1 hour", "day": "1 day", "week": "1 week", "month": "1 month"}
+
+
+def local_now() -> datetime:
+    """Current wall-clock time in STATS_TZ, as a naive datetime."""
+    return datetime.now(_TZ).replace(tzinfo=None)
+
+
+def bucket_start(dt: datetime, bucket: str) -> datetime:
+    """Python twin of Postgres date_trunc() for the supported buckets."""
+    if bucket == "hour":
+        return dt.replace(minute=0, second=0, microsecond=0)
+    dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        return dt - timedelta(days=dt.weekday())
+    if bucket == "month":
+        return dt.replace(day=1)
+    return dt
+
+
+def bucket_next(dt: datetime, bucket: str) -> datetime:
+    """Start of the bucket following the one that starts at *dt*."""
+    if bucket == "month":
+        return (dt.replace(day=28) + timedelta(days=4)).replace(day=1)
+    if bucket == "week":
+        return dt + timedelta(weeks=1)
+    if bucket == "day":
+        return dt + timedelta(days=1)
+    return dt + timedelta(hours=1)
+
+
+def series_key(gen: int, bucket: str, start: datetime) -> str:
+    return f"series:{gen}:{bucket}:{start.isoformat()}"
+
+
+def touch_order_history(cur, created_at) -> list[str]:
+    """
+    An order's paid status changed, inside the transaction on *cur*.
+    Orders from today only touch today's closed hours — their keys are
+    returned for bust() and outbox.enqueue(); older ones touch closed
+    days/weeks/months too, so the whole history generation is bumped.
+    """
+    if created_at is None:
+        return []
+    local = created_at.astimezone(_TZ).replace(tzinfo=None)
+    now   = local_now()
+    if local < bucket_start(now, "day"):
+        bump_history(cur)
+        return []
+    if local < bucket_start(now, "hour"):
+        return [series_key(history_generation(), "hour", bucket_start(local, "hour"))]
+    return []
+
+
 # ════════════════════════════════════════════════════════════════════════════════
 #                          REQUEST TIMING MIDDLEWARE
 # ════════════════════════════════════════════════════════════════════════════════
@@ -189,6 +295,11 @@ def not_found(exc):
     return jsonify(error="Resource not found"), 404
 
 
+@app.errorhandler(idempotency.IdempotencyConflict)
+def idempotency_conflict(exc):
+    return jsonify(error=str(exc)), 422
+
+
 @app.errorhandler(RuntimeError)
 def db_pool_error(exc):
     logger.error("Pool error: %s", exc)
@@ -232,19 +343,142 @@ def update_table_status(table_id):
         )
         if not cur.fetchone():
             return jsonify(error="Table not found"), 404
+        outbox.enqueue(cur, "table_updated", {"table_id": table_id}, CACHE_TABLES)
 
     bust(CACHE_TABLES)
-    emit_event("table_updated", {"table_id": table_id})
     return jsonify(message="Table status updated")
 
 
 app.register_blueprint(tables_bp)
 
+# ── Menu ──────────────────────────────────────────────────────────────────────
+
+menu_bp = Blueprint("menu", __name__, url_prefix="/menu")
+
+_MENU_IMMUTABLE = "public, max-age=31536000, immutable"
+_MENU_FIELDS    = ("category", "name", "price", "img", "available")
+
+
+def _menu_response(snapshot: dict, cache_control: str) -> Response:
+    if request.if_none_match.contains_weak(snapshot["version"]):
+        response = Response(status=304)
+    else:
+        response = Response(snapshot["body"], mimetype="application/json")
+    response.set_etag(snapshot["version"])
+    response.headers["Cache-Control"]  = cache_control
+    response.headers["X-Menu-Version"] = snapshot["version"]
+    return response
+
+
+@menu_bp.get("")
+@cache_compressed(timeout=0)
+def get_menu():
+    """Current menu — always revalidated, so an unchanged menu costs a bodiless 304."""
+    return _menu_response(current_snapshot(), "no-cache")
+
+
+@menu_bp.get("/<version>")
+@cache_compressed(timeout=0)
+def get_menu_version(version):
+    """Immutable, versioned menu URL.  Stale versions redirect to the current one."""
+    snapshot = current_snapshot()
+    if version != snapshot["version"]:
+        # Maybe another worker just changed the menu — confirm before redirecting
+        snapshot = current_snapshot(max_age=0)
+    if version != snapshot["version"]:
+        response = redirect(url_for("menu.get_menu_version", version=snapshot["version"]))
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    return _menu_response(snapshot, _MENU_IMMUTABLE)
+
+
+@menu_bp.put("/items/<int:item_id>")
+@jwt_required()
+def update_menu_item(item_id):
+    data = request.get_json()
+    fields = {k: data[k] for k in _MENU_FIELDS if k in data} if data else {}
+    if not fields:
+        return jsonify(error=f"At least one of {', '.join(_MENU_FIELDS)} required"), 400
+    if "price" in fields:
+        try:
+            fields["price"] = Decimal(str(fields["price"]))
+        except InvalidOperation:
+            return jsonify(error="price must be a number"), 400
+        if fields["price"] < 0:
+            return jsonify(error="price must not be negative"), 400
+    if "available" in fields and not isinstance(fields["available"], bool):
+        return jsonify(error="available must be true or false"), 400
+
+    # Column names come from the _MENU_FIELDS whitelist, never from the client
+    assignments = ", ".join(f"{column}=%s" for column in fields)
+    with db_conn() as cur:
+        cur.execute(
+            f"UPDATE menu_items SET {assignments} WHERE id=%s RETURNING id",
+            (*fields.values(), item_id),
+        )
+        if not cur.fetchone():
+            return jsonify(error="Menu item not found"), 404
+        snapshot = publish_snapshot(cur)
+        outbox.enqueue(cur, "menu_updated", {"version": snapshot["version"]})
+
+    install_snapshot(snapshot)
+    return jsonify(message="Menu item updated", version=snapshot["version"])
+
+
+app.register_blueprint(menu_bp)
+
 # ── Orders ────────────────────────────────────────────────────────────────────
 
 orders_bp = Blueprint("orders", __name__, url_prefix="/orders")
 
 
+def _reprice(data: dict, snapshot: dict):
+    try:
+        items, total = price_order(data.get("items"), snapshot)
+    except MenuError as exc:
+        return None, None, (jsonify(error=str(exc), menu_version=snapshot["version"]), 409)
+    except ValueError as exc:
+        return None, None, (jsonify(error=str(exc)), 400)
+
+    client_total = data.get("total")
+    if client_total is not None:
+        try:
+            stale = Decimal(str(client_total)) != total
+        except InvalidOperation:
+            stale = True
+        if stale:
+            return None, None, (jsonify(
+                error="Order total does not match current menu prices",
+                total=float(total),
+                menu_version=snapshot["version"],
+            ), 409)
+
+    return items, total, None
+
+
+def _price_cart(data: dict):
+    """
+    Reprice the cart against the menu's price index — never trust client prices.
+    Returns (items, total, None) or (None, None, error_response).
+    The snapshot is trusted for VERSION_CHECK_INTERVAL; only a menu mismatch
+    pays for a menu_version read, so a worker that missed a change retries once.
+    """
+    snapshot = current_snapshot()
+    items, total, rejected = _reprice(data, snapshot)
+    if rejected is not None and rejected[1] == 409:
+        latest = current_snapshot(max_age=0)
+        if latest is not snapshot:
+            items, total, rejected = _reprice(data, latest)
+    return items, total, rejected
+
+
+def _replay_response(status: int, body: dict):
+    response = jsonify(body)
+    response.status_code = status
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
 @orders_bp.post("")
 def create_order():
     data = request.get_json()
@@ -256,34 +490,73 @@ def create_order():
     if not session_id:
         return jsonify(error="session_id is required"), 400
 
+    # Retries carrying the same Idempotency-Key replay the original response
+    key = request.headers.get("Idempotency-Key")
+    req_hash = None
+    if key is not None:
+        if not key or len(key) > idempotency.MAX_KEY_LENGTH:
+            return jsonify(error="Idempotency-Key must be 1-255 characters"), 400
+        req_hash = idempotency.request_hash(data)
+        replay = idempotency.cached(key, req_hash)
+        if replay:
+            return _replay_response(*replay)
+
+    items, total, rejected = _price_cart(data)
+    if rejected is not None:
+        # The menu may have changed since the original, successful attempt
+        if key:
+            with db_conn() as cur:
+                replay = idempotency.lookup(cur, key, req_hash)
+            if replay:
+                return _replay_response(*replay)
+        return rejected
+
+    body = replay = None
     with db_conn() as cur:
-        cur.execute(
-            """
-            INSERT INTO orders
-                (table_id, items, total, status, customer_name, whatsapp, session_id)
-            VALUES (%s, %s, %s, 'pending', %s, %s, %s)
-            RETURNING id
-            """,
-            (
-                table_id,
-                json.dumps(data.get("items", [])),
-                data.get("total", 0),
-                data.get("customer_name"),
-                data.get("whatsapp"),
-                session_id,
-            ),
-        )
-        order_id = cur.fetchone()["id"]
-
-        if table_id:
+        if key and not idempotency.claim(cur, key, req_hash):
+            replay = idempotency.lookup(cur, key, req_hash)
+        else:
             cur.execute(
-                "UPDATE tables SET status='reserved' WHERE id=%s",
-                (table_id,),
+                """
+                INSERT INTO orders
+                    (table_id, items, total, status, customer_name, whatsapp, session_id)
+                VALUES (%s, %s, %s, 'pending', %s, %s, %s)
+                RETURNING id
+                """,
+                (
+                    table_id,
+                    json.dumps(items),
+                    total,
+                    data.get("customer_name"),
+                    data.get("whatsapp"),
+                    session_id,
+                ),
             )
+            order_id = cur.fetchone()["id"]
+
+            if table_id:
+                cur.execute(
+                    "UPDATE tables SET status='reserved' WHERE id=%s",
+                    (table_id,),
+                )
+
+            body = {"message": "Order created successfully", "order_id": order_id}
+            if key:
+                idempotency.store(cur, key, 201, body)
+            outbox.enqueue(
+                cur, "new_order", {"message": "New order received", "order_id": order_id},
+                CACHE_TABLES, CACHE_ORDERS, CACHE_FINANCE,
+            )
+
+    if body is None:
+        if replay:
+            return _replay_response(*replay)
+        return jsonify(error="A request with this Idempotency-Key is still in progress"), 409
 
+    if key:
+        idempotency.remember(key, req_hash, 201, body)
     bust(CACHE_TABLES, CACHE_ORDERS, CACHE_FINANCE)
-    emit_event("new_order", {"message": "New order received", "order_id": order_id})
-    return jsonify(message="Order created successfully", order_id=order_id), 201
+    return jsonify(body), 201
 
 
 @orders_bp.get("")
@@ -347,14 +620,18 @@ def update_order_status(order_id):
 
     with db_conn() as cur:
         cur.execute(
-            "UPDATE orders SET status=%s WHERE id=%s RETURNING id",
+            "UPDATE orders SET status=%s WHERE id=%s RETURNING created_at",
             (data["status"], order_id),
         )
-        if not cur.fetchone():
+        row = cur.fetchone()
+        if not row:
             return jsonify(error="Order not found"), 404
+        # A status change can move an order into or out of the paid aggregates
+        history = touch_order_history(cur, row["created_at"])
+        outbox.enqueue(cur, "order_updated", {"order_id": order_id},
+                       CACHE_ORDERS, CACHE_FINANCE, history)
 
-    bust(CACHE_ORDERS)
-    emit_event("order_updated", {"order_id": order_id})
+    bust(CACHE_ORDERS, CACHE_FINANCE, history)
     return jsonify(message="Status updated")
 
 
@@ -364,7 +641,7 @@ def mark_paid(order_id):
     with db_conn() as cur:
         # Mark order paid and grab the table_id in one round-trip
         cur.execute(
-            "UPDATE orders SET status='paid' WHERE id=%s RETURNING table_id",
+            "UPDATE orders SET status='paid' WHERE id=%s RETURNING table_id, created_at",
             (order_id,),
         )
         row = cur.fetchone()
@@ -372,14 +649,14 @@ def mark_paid(order_id):
             return jsonify(error="Order not found"), 404
 
         table_id = row["table_id"]
+        history  = touch_order_history(cur, row["created_at"])
+        outbox.enqueue(cur, "order_updated", {"order_id": order_id},
+                       CACHE_TABLES, CACHE_ORDERS, CACHE_FINANCE, history)
         if table_id:
             cur.execute("UPDATE tables SET status='free' WHERE id=%s", (table_id,))
+            outbox.enqueue(cur, "table_updated", {"table_id": table_id})
 
-    bust(CACHE_TABLES, CACHE_ORDERS, CACHE_FINANCE)
-    emit_event("order_updated", {"order_id": order_id})
-    if table_id:
-        emit_event("table_updated", {"table_id": table_id})
-
+    bust(CACHE_TABLES, CACHE_ORDERS, CACHE_FINANCE, history)
     return jsonify(message="Order marked paid and table freed")
 
 
@@ -534,6 +811,234 @@ def monthly_csv():
     )
 
 
+# ── Time-bucketed series + heatmap ────────────────────────────────────────────
+
+_SERIES_METRICS     = ("orders", "income", "avg_order_value")
+_SERIES_MAX_BUCKETS = int(os.getenv("STATS_MAX_BUCKETS", 1000))
+_SERIES_OPEN_TTL    = 60
+_SERIES_DEFAULT_SPAN = {
+    "hour":  timedelta(hours=47),
+    "day":   timedelta(days=29),
+    "week":  timedelta(weeks=11),
+    "month": timedelta(days=334),
+}
+_HEATMAP_DEFAULT_DAYS = 90
+
+
+def _parse_local(value: str | None) -> datetime | None:
+    """Parse ?from= / ?to= (YYYY-MM-DD or ISO datetime) as STATS_TZ wall time."""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(_TZ).replace(tzinfo=None)
+    return dt
+
+
+def _series_point(start: datetime, orders: int, income) -> dict:
+    income = float(income)
+    return {
+        "start":           start.isoformat(),
+        "orders":          orders,
+        "income":          income,
+        "avg_order_value": round(income / orders, 2) if orders else 0.0,
+    }
+
+
+def _query_series(bucket: str, lo: datetime, hi: datetime) -> list[dict]:
+    """Gap-filled paid-order aggregates for every bucket in [lo, hi]."""
+    with db_conn() as cur:
+        cur.execute(
+            """
+            WITH buckets AS (
+                SELECT generate_series(%(lo)s::timestamp, %(hi)s::timestamp,
+                                       %(step)s::interval) AS start
+            ),
+            agg AS (
+                SELECT
+                    DATE_TRUNC(%(bucket)s, created_at AT TIME ZONE %(tz)s) AS start,
+                    COUNT(*)                                              AS orders,
+                    COALESCE(SUM(total), 0)                               AS income
+                FROM orders
+                WHERE status = 'paid'
+                  AND created_at >= %(lo)s::timestamp AT TIME ZONE %(tz)s
+                  AND created_at <  (%(hi)s::timestamp + %(step)s::interval) AT TIME ZONE %(tz)s
+                GROUP BY 1
+            )
+            SELECT b.start,
+                   COALESCE(a.orders, 0) AS orders,
+                   COALESCE(a.income, 0) AS income
+            FROM buckets b
+            LEFT JOIN agg a USING (start)
+            ORDER BY b.start
+            """,
+            {"lo": lo, "hi": hi, "bucket": bucket, "step": _BUCKET_STEP[bucket], "tz": STATS_TZ},
+        )
+        return cur.fetchall()
+
+
+def _series(bucket: str, first: datetime, last: datetime) -> list[dict]:
+    """
+    Points for every bucket from *first* to *last*.
+    Closed buckets come from the cache (kept for STATS_HISTORY_TTL); only the
+    missing ones and the current open bucket are computed, in one query.
+    """
+    open_start = bucket_start(local_now(), bucket)
+    last       = min(last, open_start)
+
+    starts, cur = [], first
+    while cur <= last:
+        starts.append(cur)
+        if len(starts) > _SERIES_MAX_BUCKETS:
+            raise ValueError(f"Range exceeds {_SERIES_MAX_BUCKETS} {bucket} buckets")
+        cur = bucket_next(cur, bucket)
+
+    gen      = history_generation()
+    closed   = [s for s in starts if s < open_start]
+    cached   = cache.get_many(*[series_key(gen, bucket, s) for s in closed]) if closed else []
+    points   = {s: p for s, p in zip(closed, cached) if p is not None}
+    missing  = [s for s in closed if s not in points]
+
+    open_key = f"series_open_{bucket}"
+    need     = list(missing)
+    if starts and starts[-1] == open_start:
+        point = cache.get(open_key)
+        if point and point["start"] == open_start.isoformat():
+            points[open_start] = point
+        else:
+            need.append(open_start)
+
+    if need:
+        fresh = {}
+        for row in _query_series(bucket, min(need), max(need)):
+            point = _series_point(row["start"], row["orders"], row["income"])
+            points[row["start"]] = point
+            if row["start"] < open_start:
+                fresh[series_key(gen, bucket, row["start"])] = point
+            else:
+                cache.set(open_key, point, timeout=_SERIES_OPEN_TTL)
+        if fresh:
+            cache.set_many(fresh, timeout=STATS_HISTORY_TTL)
+
+    return [points[s] for s in starts]
+
+
+def _query_heatmap(lo: datetime, hi: datetime) -> list[list[dict]]:
+    """7×24 grid (Monday-first weekday × hour) of paid orders in [lo, hi)."""
+    grid = [[{"orders": 0, "income": 0.0} for _ in range(24)] for _ in range(7)]
+    with db_conn() as cur:
+        cur.execute(
+            """
+            SELECT
+                EXTRACT(ISODOW FROM local)::INT - 1 AS weekday,
+                EXTRACT(HOUR   FROM local)::INT     AS hour,
+                COUNT(*)                            AS orders,
+                COALESCE(SUM(total), 0)             AS income
+            FROM (
+                SELECT created_at AT TIME ZONE %(tz)s AS local, total
+                FROM orders
+                WHERE status = 'paid'
+                  AND created_at >= %(lo)s::timestamp AT TIME ZONE %(tz)s
+                  AND created_at <  %(hi)s::timestamp AT TIME ZONE %(tz)s
+            ) o
+            GROUP BY 1, 2
+            """,
+            {"lo": lo, "hi": hi, "tz": STATS_TZ},
+        )
+        for row in cur.fetchall():
+            grid[row["weekday"]][row["hour"]] = {
+                "orders": row["orders"], "income": float(row["income"]),
+            }
+    return grid
+
+
+@stats_bp.get("/series")
+@jwt_required()
+def stats_series():
+    """Gap-filled paid-order series.  ?from=&to=&bucket=hour|day|week|month&metric="""
+    bucket = request.args.get("bucket", "day")
+    metric = request.args.get("metric", "income")
+    if bucket not in _BUCKET_STEP:
+        return jsonify(error=f"bucket must be one of: {', '.join(_BUCKET_STEP)}"), 400
+    if metric not in _SERIES_METRICS:
+        return jsonify(error=f"metric must be one of: {', '.join(_SERIES_METRICS)}"), 400
+
+    try:
+        end   = _parse_local(request.args.get("to")) or local_now()
+        start = _parse_local(request.args.get("from")) or end - _SERIES_DEFAULT_SPAN[bucket]
+        if start > end:
+            return jsonify(error="from must not be after to"), 400
+        points = _series(bucket, bucket_start(start, bucket), bucket_start(end, bucket))
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+
+    return jsonify(
+        bucket=bucket,
+        metric=metric,
+        timezone=STATS_TZ,
+        series=[{"start": p["start"], "value": p[metric]} for p in points],
+    )
+
+
+@stats_bp.get("/heatmap")
+@jwt_required()
+def stats_heatmap():
+    """Paid orders by weekday × hour.  ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive)"""
+    today = bucket_start(local_now(), "day")
+    try:
+        last  = bucket_start(_parse_local(request.args.get("to")) or today, "day")
+        first = bucket_start(
+            _parse_local(request.args.get("from"))
+            or last - timedelta(days=_HEATMAP_DEFAULT_DAYS - 1),
+            "day",
+        )
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    if first > last:
+        return jsonify(error="from must not be after to"), 400
+
+    grids = []
+    # A range entirely in the future has no orders yet — return an empty grid
+    if first <= today:
+        last = min(last, today)
+
+        # Fully closed days never change — cache that part of the range for weeks
+        closed_end = min(last + timedelta(days=1), today)
+        if first < closed_end:
+            key  = f"heatmap:{history_generation()}:{first.date()}:{closed_end.date()}"
+            grid = cache.get(key)
+            if grid is None:
+                grid = _query_heatmap(first, closed_end)
+                cache.set(key, grid, timeout=STATS_HISTORY_TTL)
+            grids.append(grid)
+
+    if last == today:
+        grid = cache.get("heatmap_today")
+        if grid is None or grid.get("day") != today.isoformat():
+            grid = {"day": today.isoformat(),
+                    "cells": _query_heatmap(today, today + timedelta(days=1))}
+            cache.set("heatmap_today", grid, timeout=_SERIES_OPEN_TTL)
+        grids.append(grid["cells"])
+
+    cells = [[{"orders": 0, "income": 0.0} for _ in range(24)] for _ in range(7)]
+    for grid in grids:
+        for d in range(7):
+            for h in range(24):
+                cells[d][h]["orders"] += grid[d][h]["orders"]
+                cells[d][h]["income"] += grid[d][h]["income"]
+
+    by_hour    = [sum(cells[d][h]["orders"] for d in range(7)) for h in range(24)]
+    by_weekday = [sum(cells[d][h]["orders"] for h in range(24)) for d in range(7)]
+    return jsonify(
+        timezone=STATS_TZ,
+        **{"from": first.date().isoformat(), "to": last.date().isoformat()},
+        weekdays=["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"],
+        cells=cells,
+        peak_hour=max(range(24), key=by_hour.__getitem__) if any(by_hour) else None,
+        peak_weekday=max(range(7), key=by_weekday.__getitem__) if any(by_weekday) else None,
+    )
+
+
 app.register_blueprint(stats_bp)
 
 # ── Admin ─────────────────────────────────────────────────────────────────────
@@ -558,6 +1063,78 @@ def admin_login():
     return jsonify(message="Invalid credentials"), 401
 
 
+_BULK_MIMETYPES = {"csv": "text/csv", "binary": "application/octet-stream"}
+
+
+def _rebuild_aggregates() -> None:
+    """Drop every cache derived from orders, in every worker."""
+    with db_conn() as cur:
+        bump_history(cur)
+        outbox.enqueue(cur, None, None, *AGGREGATES)
+    bust(*AGGREGATES)
+
+
+@admin_bp.get("/bulk/orders/export")
+@jwt_required()
+def bulk_export_orders():
+    """Stream orders out via COPY.  ?format=csv|binary&from=&to=&status="""
+    fmt = request.args.get("format", "csv")
+    try:
+        spool = bulk_io.export_to_spool(
+            fmt,
+            since=request.args.get("from"),
+            until=request.args.get("to"),
+            status=request.args.get("status"),
+        )
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+
+    def stream():
+        with spool:
+            while chunk := spool.read(64 * 1024):
+                yield chunk
+
+    filename = f"orders_export.{'csv' if fmt == 'csv' else 'bin'}"
+    return Response(
+        stream(),
+        mimetype=_BULK_MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@admin_bp.post("/bulk/orders/import")
+@jwt_required()
+def bulk_import_orders():
+    """Load historical orders via COPY.  Body: raw file or multipart 'file'.  ?format=&skip_invalid=1"""
+    fmt          = request.args.get("format", "csv")
+    skip_invalid = request.args.get("skip_invalid") in ("1", "true")
+    if fmt not in bulk_io.FORMATS:
+        return jsonify(error=f"format must be one of: {', '.join(bulk_io.FORMATS)}"), 400
+
+    upload = request.files.get("file")
+    raw    = upload.stream if upload else request.stream
+    stream = raw if fmt == "binary" else io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+    try:
+        result = bulk_io.import_orders(stream, fmt, skip_invalid=skip_invalid,
+                                       before_commit=enqueue_orders_imported)
+    except bulk_io.BulkImportError as exc:
+        return jsonify(error=str(exc), errors=exc.errors), 400
+    except UnicodeDecodeError:
+        return jsonify(error="CSV must be UTF-8 encoded"), 400
+
+    bust(*AGGREGATES)
+    return jsonify(result), 201
+
+
+@admin_bp.post("/bulk/rebuild")
+@jwt_required()
+def bulk_rebuild():
+    """Drop cached aggregates — e.g. after orders were edited directly in SQL."""
+    _rebuild_aggregates()
+    return jsonify(message="Cached aggregates dropped")
+
+
 app.register_blueprint(admin_bp)
 
 
@@ -567,14 +1144,21 @@ app.register_blueprint(admin_bp)
 
 @app.get("/health")
 def health_check():
-    """Liveness probe — also tests DB connectivity."""
-    try:
-        with db_conn() as cur:
-            cur.execute("SELECT 1")
-        return jsonify(status="ok", db="connected"), 200
-    except Exception as exc:
-        logger.error("Health check DB failure: %s", exc)
-        return jsonify(status="degraded", db="unavailable"), 503
+    """Liveness probe — serves the background prober's latest snapshot, no DB checkout."""
+    snapshot = health.latest()
+    if snapshot is None:
+        return jsonify(status="starting"), 503
+    alive = snapshot["db"]["status"] != "unavailable" and snapshot["age_s"] <= health.MAX_AGE
+    return jsonify(status="ok" if alive else "degraded", **snapshot), 200 if alive else 503
+
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe — 503 while latency / pool thresholds are exceeded."""
+    snapshot = health.latest()
+    reasons  = health.readiness(snapshot)
+    body     = {"ready": not reasons, "reasons": reasons, **(snapshot or {})}
+    return jsonify(body), 503 if reasons else 200
 
 
 # ════════════════════════════════════════════════════════════════════════════════
@@ -0,0 +1,197 @@
+"""
+build_assets.py — Build-time image optimisation for menu assets
+===============================================================
+• Resizes every image under frontend/public/assets into responsive widths
+• Emits AVIF + WebP + progressive JPEG, EXIF-rotated and metadata-stripped
+• Output names carry a content hash → safe for far-future, immutable caching
+• Writes assets-manifest.json (original path → variants) for the frontend
+  and the /menu snapshot
+• Incremental: unchanged sources (same bytes, same settings) are skipped
+• Runs in parallel across all cores
+
+Usage:
+    pip install -r requirements-build.txt
+    python build_assets.py [--force] [--workers N]
+"""
+
+import os
+import io
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover — build-time dependency only
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+_PUBLIC   = Path(__file__).resolve().parent.parent / "frontend" / "public"
+SRC_DIR   = _PUBLIC / "assets"
+OUT_DIR   = SRC_DIR / "_opt"
+MANIFEST  = _PUBLIC / "assets-manifest.json"
+
+_SOURCE_EXTS = {".jpg", ".jpeg", ".png"}
+
+# ── Encoder settings — any change here re-encodes every image ─────────────────
+WIDTHS  = (320, 640, 960)
+FORMATS = {
+    "avif": {"format": "AVIF", "quality": 50},
+    "webp": {"format": "WEBP", "quality": 75, "method": 6},
+    "jpeg": {"format": "JPEG", "quality": 78, "optimize": True, "progressive": True},
+}
+_SETTINGS_KEY = hashlib.sha256(
+    json.dumps([WIDTHS, FORMATS], sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+
+def _public_url(path: Path) -> str:
+    return "/" + path.relative_to(_PUBLIC).as_posix()
+
+
+def _available_formats() -> dict:
+    """Drop AVIF when this Pillow build cannot encode it."""
+    if features.check("avif"):
+        return FORMATS
+    logger.warning("Pillow has no AVIF encoder — emitting WebP + JPEG only")
+    return {k: v for k, v in FORMATS.items() if k != "avif"}
+
+
+def _optimise(src: Path, source_hash: str, formats: dict) -> dict:
+    """Encode every width × format for one source image (runs in a worker)."""
+    with Image.open(src) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        width, height = img.size
+
+        rel     = src.relative_to(SRC_DIR).with_suffix("")
+        widths  = sorted({w for w in WIDTHS if w < width} | {min(width, max(WIDTHS))})
+        entry   = {"source": source_hash, "width": width, "height": height, "variants": {}}
+
+        for w in widths:
+            h = round(height * w / width)
+            resized = img if w == width else img.resize((w, h), Image.LANCZOS)
+            for ext, options in formats.items():
+                frame = resized.convert("RGB") if ext == "jpeg" else resized
+                buf = io.BytesIO()
+                # No exif/icc arguments → metadata is stripped
+                frame.save(buf, **options)
+                data   = buf.getvalue()
+                digest = hashlib.sha256(data).hexdigest()[:10]
+                out    = OUT_DIR / rel.parent / f"{rel.name}-{w}.{digest}.{ext}"
+                if not out.exists():
+                    out.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = out.with_suffix(out.suffix + ".tmp")
+                    tmp.write_bytes(data)
+                    tmp.replace(out)
+                entry["variants"].setdefault(ext, []).append(
+                    {"width": w, "height": h, "src": _public_url(out), "bytes": len(data)}
+                )
+    return entry
+
+
+def _load_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST.read_text("utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _is_fresh(entry: dict | None, source_hash: str) -> bool:
+    if not entry or entry.get("source") != source_hash:
+        return False
+    return all(
+        (_PUBLIC / v["src"].lstrip("/")).exists()
+        for variants in entry["variants"].values()
+        for v in variants
+    )
+
+
+def build(force: bool = False, workers: int | None = None) -> dict:
+    """Optimise all assets, write the manifest, and prune orphaned outputs."""
+    if Image is None:
+        raise RuntimeError("Pillow is not installed — pip install -r requirements-build.txt")
+
+    formats  = _available_formats()
+    previous = _load_manifest()
+    settings = previous.get("settings") == _SETTINGS_KEY and previous.get("formats") == list(formats)
+    old      = previous.get("images", {}) if settings and not force else {}
+
+    sources = sorted(
+        p for p in SRC_DIR.rglob("*")
+        if p.suffix.lower() in _SOURCE_EXTS and OUT_DIR not in p.parents
+    )
+
+    images, todo = {}, []
+    for src in sources:
+        url         = _public_url(src)
+        source_hash = hashlib.sha256(src.read_bytes()).hexdigest()[:16]
+        if _is_fresh(old.get(url), source_hash):
+            images[url] = old[url]
+        else:
+            todo.append((url, src, source_hash))
+
+    logger.info("%d images, %d up to date, %d to build",
+                len(sources), len(sources) - len(todo), len(todo))
+
+    failed = 0
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_optimise, src, h, formats): url for url, src, h in todo}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    images[url] = future.result()
+                    logger.info("Built %s", url)
+                except Exception as exc:
+                    failed += 1
+                    logger.error("Failed to optimise %s: %s", url, exc)
+
+    manifest = {
+        "settings": _SETTINGS_KEY,
+        "formats":  list(formats),
+        "images":   dict(sorted(images.items())),
+    }
+    tmp = MANIFEST.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2) + "\n", "utf-8")
+    tmp.replace(MANIFEST)
+
+    # Prune variants no longer referenced (old hashes, deleted sources)
+    live = {
+        _PUBLIC / v["src"].lstrip("/")
+        for entry in images.values()
+        for variants in entry["variants"].values()
+        for v in variants
+    }
+    for path in OUT_DIR.rglob("*") if OUT_DIR.exists() else ():
+        if path.is_file() and path not in live:
+            path.unlink()
+
+    if failed:
+        raise RuntimeError(f"{failed} image(s) failed to optimise")
+    return manifest
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Optimise menu images into responsive variants.")
+    parser.add_argument("--force", action="store_true", help="re-encode every image")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parallel worker processes")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    try:
+        build(force=args.force, workers=args.workers)
+    except RuntimeError as exc:
+        logger.error("%s", exc)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
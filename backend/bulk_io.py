@@ -0,0 +1,382 @@
+"""
+bulk_io.py — Bulk historical import/export via PostgreSQL COPY
+==============================================================
+• export_orders(): COPY (SELECT …) TO STDOUT as CSV or binary — rows never
+  pass through Python
+• import_orders(): CSV is validated in Python in batches, each batch loaded
+  with one COPY … FROM STDIN; binary (our own export format) goes through a
+  staging table and is validated in SQL
+• CSV values are range-checked against the orders column types in Python;
+  a malformed file or a batch the database still rejects aborts the import
+  with the offending line range
+• One transaction per import — strict mode rolls back on any invalid row
+• Long loops yield (time.sleep(0)) every few rows and every COPY chunk, so
+  an import inside an eventlet worker never starves its other green threads
+• ANALYZE afterwards so the planner sees the new data distribution
+
+CLI:
+    python bulk_io.py export [--format csv|binary] [--from DATE] [--to DATE] [-o FILE]
+    python bulk_io.py import FILE [--format csv|binary] [--skip-invalid]
+"""
+
+import io
+import os
+import csv
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+from decimal import Decimal, InvalidOperation
+from datetime import datetime
+
+import psycopg2
+
+from database import db_conn
+from invalidation import enqueue_orders_imported
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "binary")
+
+EXPORT_COLUMNS = (
+    "id", "table_id", "items", "total", "status",
+    "customer_name", "whatsapp", "session_id", "created_at",
+)
+# Ids are always assigned by the orders sequence on import
+IMPORT_COLUMNS = EXPORT_COLUMNS[1:]
+IMPORT_STATUSES = ("preparing", "pending", "ready", "paid")
+
+# Naive timestamps in imported files are read in this zone
+BULK_TZ = os.getenv("BULK_TIMEZONE", os.getenv("STATS_TIMEZONE", "Asia/Kolkata"))
+
+# Column limits of orders.table_id (INTEGER) and orders.total (NUMERIC(10, 2))
+MAX_TABLE_ID = 2**31 - 1
+MAX_TOTAL    = Decimal(10) ** 8
+
+_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 50_000))
+_MAX_ERRORS = 50
+_SPOOL_SIZE = 8 * 1024 * 1024
+# Rows validated between cooperative yields
+_YIELD_EVERY = 1000
+
+
+class BulkImportError(ValueError):
+    """Strict import aborted — carries the per-row errors found."""
+
+    def __init__(self, message: str, errors: list[str]):
+        super().__init__(message)
+        self.errors = errors
+
+
+# ── Export ────────────────────────────────────────────────────────────────────
+
+def export_orders(out, fmt: str = "csv", since: str | None = None,
+                  until: str | None = None, status: str | None = None) -> None:
+    """
+    Stream orders into the binary file object *out* with COPY TO STDOUT.
+    *since* / *until* are ISO dates or datetimes (until is exclusive).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+
+    where, params = [], []
+    if since:
+        where.append("created_at >= %s")
+        params.append(datetime.fromisoformat(since))
+    if until:
+        where.append("created_at < %s")
+        params.append(datetime.fromisoformat(until))
+    if status:
+        where.append("status = %s")
+        params.append(status)
+
+    select = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM orders"
+    if where:
+        select += " WHERE " + " AND ".join(where)
+    select += " ORDER BY created_at ASC, id ASC"
+    options = "FORMAT csv, HEADER" if fmt == "csv" else "FORMAT binary"
+
+    with db_conn() as cur:
+        cur.execute("SET LOCAL TIME ZONE %s", (BULK_TZ,))
+        # COPY takes no bind parameters — inline them with proper quoting
+        query = cur.mogrify(select, params).decode("utf-8")
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH ({options})", out)
+
+
+def export_to_spool(fmt: str = "csv", **filters) -> tempfile.SpooledTemporaryFile:
+    """Run export_orders() into a spooled temp file, rewound and ready to stream."""
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_SIZE)
+    try:
+        export_orders(spool, fmt, **filters)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+# ── Import ────────────────────────────────────────────────────────────────────
+
+def _yield() -> None:
+    """Let other green threads run — eventlet patches time.sleep; a no-op in the CLI."""
+    time.sleep(0)
+
+
+class _YieldingReader:
+    """File wrapper for COPY FROM STDIN that yields before handing over each chunk."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def read(self, size: int = -1):
+        _yield()
+        return self._stream.read(size)
+
+    def readline(self, size: int = -1):
+        _yield()
+        return self._stream.readline(size)
+
+
+def _optional_text(value: str | None) -> str | None:
+    value = (value or "").strip()
+    return value or None
+
+
+def _validate_row(row: dict) -> list:
+    """Turn one CSV record into IMPORT_COLUMNS values; raises ValueError."""
+    table_id = _optional_text(row.get("table_id"))
+    if table_id is not None:
+        table_id = int(table_id)
+        if not 1 <= table_id <= MAX_TABLE_ID:
+            raise ValueError(f"table_id must be between 1 and {MAX_TABLE_ID}")
+
+    try:
+        items = json.loads(row.get("items") or "")
+    except ValueError:
+        raise ValueError("items must be a JSON list") from None
+    if not isinstance(items, list) or not all(
+        isinstance(i, dict) and isinstance(i.get("name"), str)
+        and isinstance(i.get("quantity"), int) and not isinstance(i["quantity"], bool)
+        and i["quantity"] > 0
+        for i in items
+    ):
+        raise ValueError("items must be a list of {name, quantity>0} objects")
+
+    try:
+        total = Decimal((row.get("total") or "").strip())
+    except InvalidOperation:
+        raise ValueError("total must be a number") from None
+    if not total.is_finite() or not 0 <= total < MAX_TOTAL:
+        raise ValueError(f"total must be a non-negative number below {MAX_TOTAL}")
+    if total.as_tuple().exponent < -2:
+        raise ValueError("total must have at most 2 decimal places")
+
+    status = _optional_text(row.get("status")) or "paid"
+    if status not in IMPORT_STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(IMPORT_STATUSES)}")
+
+    created_at = _optional_text(row.get("created_at"))
+    if created_at is None:
+        raise ValueError("created_at is required")
+    created_at = datetime.fromisoformat(created_at).isoformat()
+
+    return [
+        table_id, json.dumps(items, separators=(",", ":")), total, status,
+        _optional_text(row.get("customer_name")),
+        _optional_text(row.get("whatsapp")),
+        _optional_text(row.get("session_id")),
+        created_at,
+    ]
+
+
+def _copy_batch(cur, buf: io.StringIO, lines: str) -> None:
+    """COPY one validated batch; anything the database still rejects aborts the import."""
+    buf.seek(0)
+    try:
+        cur.copy_expert(
+            f"COPY orders ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            _YieldingReader(buf),
+        )
+    except (psycopg2.DataError, psycopg2.IntegrityError) as exc:
+        message = exc.diag.message_primary or str(exc).strip()
+        raise BulkImportError("Batch rejected by the database — import rolled back",
+                              [f"{lines}: {message}"]) from None
+    buf.seek(0)
+    buf.truncate()
+
+
+def _import_csv(cur, stream, skip_invalid: bool, batch_size: int) -> dict:
+    reader = csv.DictReader(stream)
+    try:
+        missing = {"items", "total", "created_at"} - set(reader.fieldnames or ())
+    except csv.Error as exc:
+        raise BulkImportError("Malformed CSV header", [f"line 1: {exc}"]) from None
+    if missing:
+        raise BulkImportError("Missing CSV columns", [f"missing column: {c}" for c in sorted(missing)])
+
+    buf      = io.StringIO()
+    writer   = csv.writer(buf)
+    imported = rejected = pending = 0
+    first    = last = None
+    errors: list[str] = []
+
+    rows = iter(reader)
+    while True:
+        # line_num is the physical line a record ends on — quoted newlines included
+        try:
+            row = next(rows)
+        except StopIteration:
+            break
+        except csv.Error as exc:
+            raise BulkImportError("Malformed CSV — import rolled back",
+                                  [*errors[:_MAX_ERRORS - 1], f"line {reader.line_num}: {exc}"]) from None
+        line = reader.line_num
+        if (imported + rejected + pending) % _YIELD_EVERY == 0:
+            _yield()
+
+        try:
+            writer.writerow(_validate_row(row))
+        except ValueError as exc:
+            rejected += 1
+            if len(errors) < _MAX_ERRORS:
+                errors.append(f"line {line}: {exc}")
+            if not skip_invalid:
+                raise BulkImportError("Invalid row — import rolled back", errors) from None
+            continue
+        first, last = first or line, line
+        pending += 1
+        if pending >= batch_size:
+            _copy_batch(cur, buf, f"lines {first}-{line}")
+            imported += pending
+            pending, first = 0, None
+            logger.info("Imported %d orders so far", imported)
+
+    if pending:
+        _copy_batch(cur, buf, f"lines {first}-{last}")
+        imported += pending
+
+    return {"imported": imported, "rejected": rejected, "errors": errors}
+
+
+def _import_binary(cur, stream, skip_invalid: bool) -> dict:
+    """Load a binary export via a staging table; domain checks run in SQL."""
+    cur.execute("CREATE TEMP TABLE orders_staging (LIKE orders) ON COMMIT DROP")
+    try:
+        cur.copy_expert(
+            f"COPY orders_staging ({', '.join(EXPORT_COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+            _YieldingReader(stream),
+        )
+    except (psycopg2.DataError, psycopg2.IntegrityError) as exc:
+        # Staging is LIKE orders — a NULL status/created_at is a NOT NULL violation
+        message = exc.diag.message_primary or str(exc).strip()
+        raise BulkImportError("Not a valid binary orders export — import rolled back",
+                              [message]) from None
+    valid = """
+        items IS NOT NULL AND created_at IS NOT NULL
+        AND total IS NOT NULL AND total >= 0
+        AND status = ANY(%(statuses)s)
+    """
+    params = {"statuses": list(IMPORT_STATUSES)}
+
+    cur.execute(f"SELECT id FROM orders_staging WHERE NOT ({valid}) ORDER BY id", params)
+    bad = [row["id"] for row in cur.fetchall()]
+    errors = [f"exported order {order_id}: invalid total/status/items" for order_id in bad[:_MAX_ERRORS]]
+    if bad and not skip_invalid:
+        raise BulkImportError("Invalid row — import rolled back", errors)
+
+    cols = ", ".join(IMPORT_COLUMNS)
+    cur.execute(
+        f"INSERT INTO orders ({cols}) SELECT {cols} FROM orders_staging "
+        f"WHERE {valid} ORDER BY created_at",
+        params,
+    )
+    return {"imported": cur.rowcount, "rejected": len(bad), "errors": errors}
+
+
+def import_orders(stream, fmt: str = "csv", skip_invalid: bool = False,
+                  batch_size: int = _BATCH_SIZE, before_commit=None) -> dict:
+    """
+    Load historical orders from *stream* (text for CSV, binary for binary)
+    in a single transaction, then ANALYZE.  Returns imported / rejected counts.
+    *before_commit(cur, result)* runs inside that transaction — the place to
+    enqueue cache invalidation; otherwise callers must drop cached aggregates.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+
+    with db_conn() as cur:
+        cur.execute("SET LOCAL TIME ZONE %s", (BULK_TZ,))
+        if fmt == "csv":
+            result = _import_csv(cur, stream, skip_invalid, batch_size)
+        else:
+            result = _import_binary(cur, stream, skip_invalid)
+        if before_commit is not None:
+            before_commit(cur, result)
+
+    with db_conn() as cur:
+        cur.execute("ANALYZE orders")
+
+    logger.info("Bulk import finished: %d imported, %d rejected",
+                result["imported"], result["rejected"])
+    return result
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk order import/export via COPY.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="write orders to a file or stdout")
+    exp.add_argument("--format", choices=FORMATS, default="csv")
+    exp.add_argument("--from", dest="since", help="ISO date/datetime, inclusive")
+    exp.add_argument("--to", dest="until", help="ISO date/datetime, exclusive")
+    exp.add_argument("--status", choices=IMPORT_STATUSES)
+    exp.add_argument("-o", "--output", help="output file (default: stdout)")
+
+    imp = sub.add_parser("import", help="load historical orders")
+    imp.add_argument("file", help="input file, or - for stdin")
+    imp.add_argument("--format", choices=FORMATS, default="csv")
+    imp.add_argument("--skip-invalid", action="store_true",
+                     help="skip bad rows instead of rolling back the whole import")
+    imp.add_argument("--batch-size", type=int, default=_BATCH_SIZE)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if args.command == "export":
+        out = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            export_orders(out, args.format, since=args.since, until=args.until, status=args.status)
+        finally:
+            if args.output:
+                out.close()
+        return 0
+
+    binary = args.format == "binary"
+    if args.file == "-":
+        stream = sys.stdin.buffer if binary else io.TextIOWrapper(sys.stdin.buffer, "utf-8", newline="")
+    else:
+        stream = open(args.file, "rb") if binary else open(args.file, encoding="utf-8", newline="")
+    try:
+        # Running servers drop their cached aggregates via the outbox
+        result = import_orders(stream, args.format, args.skip_invalid, args.batch_size,
+                               before_commit=enqueue_orders_imported)
+    except BulkImportError as exc:
+        logger.error("%s", exc)
+        for error in exc.errors:
+            logger.error("  %s", error)
+        return 1
+    finally:
+        stream.close()
+
+    for error in result["errors"]:
+        logger.warning("Skipped %s", error)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
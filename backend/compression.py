@@ -0,0 +1,207 @@
+"""
+compression.py — Negotiated response compression
+================================================
+• zstd / br / gzip picked from Accept-Encoding (q-values honoured)
+• Only text-like payloads above COMPRESS_MIN_SIZE bytes are touched
+• Streamed responses are compressed incrementally, chunk by chunk
+• Compressed bodies of cached views are cached by content digest,
+  so the same payload is never compressed twice
+• brotli / zstandard are optional — gzip is always available
+"""
+
+import os
+import zlib
+import hashlib
+import logging
+
+from flask import request, current_app
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover — optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover — optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# ── Configuration (tunable via env) ───────────────────────────────────────────
+_MIN_SIZE      = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+_GZIP_LEVEL    = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+_BROTLI_LEVEL  = int(os.getenv("COMPRESS_BROTLI_LEVEL", 5))
+_ZSTD_LEVEL    = int(os.getenv("COMPRESS_ZSTD_LEVEL", 3))
+# Streamed bodies are sync-flushed once this much input has been buffered
+_STREAM_FLUSH  = int(os.getenv("COMPRESS_STREAM_FLUSH", 16 * 1024))
+
+_COMPRESSIBLE = {
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+}
+
+
+# ── Incremental encoders — one small adapter per codec ────────────────────────
+
+class _Gzip:
+    def __init__(self):
+        self._c = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=_BROTLI_LEVEL)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+# Server preference order — used to break ties between equal q-values
+_ENCODERS = {}
+if zstandard is not None:
+    _ENCODERS["zstd"] = _Zstd
+if brotli is not None:
+    _ENCODERS["br"] = _Brotli
+_ENCODERS["gzip"] = _Gzip
+
+
+def _is_compressible(response) -> bool:
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in _COMPRESSIBLE
+
+
+def _compress_bytes(encoding: str, body: bytes) -> bytes:
+    encoder = _ENCODERS[encoding]()
+    return encoder.compress(body) + encoder.finish()
+
+
+def _compress_stream(encoding: str, chunks):
+    """Yield compressed output as the wrapped iterable produces input."""
+    encoder  = _ENCODERS[encoding]()
+    buffered = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        out = encoder.compress(chunk)
+        buffered += len(chunk)
+        if buffered >= _STREAM_FLUSH:
+            out += encoder.flush()
+            buffered = 0
+        if out:
+            yield out
+    yield encoder.finish()
+
+
+def cache_compressed(timeout: int | None = None):
+    """
+    Mark a view that serves a precomputed snapshot (not via cache.cached)
+    so its compressed variants are cached too.  timeout=0 keeps them forever —
+    safe, because the key is the digest of the uncompressed body.
+    """
+    def decorator(view):
+        view.compress_cache_timeout = timeout
+        return view
+    return decorator
+
+
+def _cache_timeout_for_view():
+    """
+    Return (True, timeout) if the current endpoint is wrapped by cache.cached
+    (or marked with @cache_compressed), so its compressed variant can live
+    exactly as long as its JSON bytes.
+    """
+    view = current_app.view_functions.get(request.endpoint)
+    if view is None:
+        return False, None
+    if hasattr(view, "compress_cache_timeout"):
+        return True, view.compress_cache_timeout
+    if hasattr(view, "uncached"):
+        return True, getattr(view, "cache_timeout", None)
+    return False, None
+
+
+def init_compression(app, cache) -> None:
+    """Register the compression after_request hook on *app*."""
+
+    @app.after_request
+    def _compress_response(response):
+        if not _is_compressible(response):
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        if (
+            request.method == "HEAD"
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or "no-transform" in response.headers.get("Cache-Control", "")
+        ):
+            return response
+
+        encoding = request.accept_encodings.best_match(list(_ENCODERS))
+        if encoding is None or encoding == "identity":
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(encoding, response.response)
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < _MIN_SIZE:
+                return response
+
+            cacheable, timeout = _cache_timeout_for_view()
+            if cacheable and request.method == "GET" and response.status_code == 200:
+                digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+                key = f"compressed:{encoding}:{digest}"
+                compressed = cache.get(key)
+                if compressed is None:
+                    compressed = _compress_bytes(encoding, body)
+                    cache.set(key, compressed, timeout=timeout)
+            else:
+                compressed = _compress_bytes(encoding, body)
+
+            response.set_data(compressed)
+
+        response.headers["Content-Encoding"] = encoding
+        # Compressed bytes differ from the identity representation
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    logger.info("Response compression enabled (%s, min=%d bytes)",
+                ", ".join(_ENCODERS), _MIN_SIZE)
@@ -5,6 +5,7 @@ database.py — Production-grade PostgreSQL connection pool
 • TCP keepalives to prevent stale connections on Render
 • Graceful degradation: pool exhaustion → clear error, not crash
 • Context-manager helper for safe acquire/release
+• pool_stats() for health reporting without checking out a connection
 """
 
 import os
@@ -90,6 +91,17 @@ def release_connection(conn: psycopg2.extensions.connection, *, error: bool = Fa
         logger.warning("Failed to release connection: %s", exc)
 
 
+def pool_stats() -> dict:
+    """Current pool usage, read from the pool's own bookkeeping (no checkout)."""
+    if _pool is None:
+        return {"max": _MAX_CONN, "in_use": 0, "idle": 0}
+    return {
+        "max":    _pool.maxconn,
+        "in_use": len(_pool._used),
+        "idle":   len(_pool._pool),
+    }
+
+
 @contextmanager
 def db_conn(autocommit: bool = False):
     """
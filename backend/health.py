@@ -0,0 +1,126 @@
+"""
+health.py — Background health prober
+====================================
+• One green thread probes DB latency, pool usage, Socket.IO and the cache
+  every HEALTH_INTERVAL seconds
+• /health and /ready serve the latest snapshot — probes never check out a
+  pool connection or compete with real traffic
+• Readiness thresholds (DB latency, pool utilisation, snapshot age) tunable via env
+"""
+
+import os
+import time
+import logging
+
+from database import db_conn, pool_stats
+
+logger = logging.getLogger(__name__)
+
+# ── Configuration (tunable via env) ───────────────────────────────────────────
+_INTERVAL            = float(os.getenv("HEALTH_INTERVAL", 5))
+_MAX_DB_LATENCY_MS   = float(os.getenv("HEALTH_MAX_DB_LATENCY_MS", 500))
+_MAX_POOL_UTIL       = float(os.getenv("HEALTH_MAX_POOL_UTILISATION", 0.9))
+# A snapshot older than this means the prober itself has stalled
+MAX_AGE              = float(os.getenv("HEALTH_MAX_AGE", _INTERVAL * 3))
+
+_snapshot: dict | None = None
+
+
+def _probe_db() -> dict:
+    started = time.perf_counter()
+    try:
+        with db_conn() as cur:
+            cur.execute("SELECT 1")
+        return {"status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+    except RuntimeError:
+        # Pool exhausted — the database is reachable, just saturated
+        return {"status": "busy", "latency_ms": None}
+    except Exception as exc:
+        logger.error("Health probe DB failure: %s", exc)
+        return {"status": "unavailable", "latency_ms": None}
+
+
+def _probe_socketio(socketio) -> dict:
+    try:
+        server = socketio.server
+        if server is None:
+            return {"status": "unavailable", "clients": 0}
+        clients = len(server.manager.rooms.get("/", {}).get(None, {}))
+        return {"status": "ok", "clients": clients}
+    except Exception as exc:
+        logger.warning("Health probe Socket.IO failure: %s", exc)
+        return {"status": "unknown", "clients": None}
+
+
+def _probe_cache(cache) -> dict:
+    started = time.perf_counter()
+    try:
+        token = time.time_ns()
+        cache.set("health_probe", token, timeout=int(MAX_AGE) + 1)
+        ok = cache.get("health_probe") == token
+        return {
+            "status":     "ok" if ok else "unavailable",
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    except Exception as exc:
+        logger.error("Health probe cache failure: %s", exc)
+        return {"status": "unavailable", "latency_ms": None}
+
+
+def probe(socketio, cache) -> dict:
+    """Run every check once and publish the result as the latest snapshot."""
+    global _snapshot
+    pool = pool_stats()
+    pool["utilisation"] = round(pool["in_use"] / pool["max"], 2) if pool["max"] else 0.0
+    _snapshot = {
+        "checked_at": time.time(),
+        "db":         _probe_db(),
+        "pool":       pool,
+        "socketio":   _probe_socketio(socketio),
+        "cache":      _probe_cache(cache),
+    }
+    return _snapshot
+
+
+def start_prober(socketio, cache) -> None:
+    """Probe once synchronously, then keep probing on a background green thread."""
+    probe(socketio, cache)
+
+    def _loop():
+        while True:
+            socketio.sleep(_INTERVAL)
+            try:
+                probe(socketio, cache)
+            except Exception as exc:
+                logger.exception("Health prober iteration failed: %s", exc)
+
+    socketio.start_background_task(_loop)
+    logger.info("Health prober started (interval=%.1fs)", _INTERVAL)
+
+
+def latest() -> dict | None:
+    """The most recent snapshot, annotated with its age in seconds."""
+    if _snapshot is None:
+        return None
+    return {**_snapshot, "age_s": round(time.time() - _snapshot["checked_at"], 1)}
+
+
+def readiness(snapshot: dict | None) -> list[str]:
+    """Reasons this instance should not receive traffic — empty means ready."""
+    if snapshot is None:
+        return ["no health snapshot yet"]
+
+    reasons = []
+    if snapshot["age_s"] > MAX_AGE:
+        reasons.append(f"health snapshot stale ({snapshot['age_s']}s old)")
+    if snapshot["db"]["status"] != "ok":
+        reasons.append(f"database {snapshot['db']['status']}")
+    elif snapshot["db"]["latency_ms"] > _MAX_DB_LATENCY_MS:
+        reasons.append(f"database latency {snapshot['db']['latency_ms']}ms > {_MAX_DB_LATENCY_MS:g}ms")
+    if snapshot["pool"]["utilisation"] > _MAX_POOL_UTIL:
+        reasons.append(f"pool utilisation {snapshot['pool']['utilisation']:.0%} > {_MAX_POOL_UTIL:.0%}")
+    if snapshot["cache"]["status"] != "ok":
+        reasons.append("cache unavailable")
+    if snapshot["socketio"]["status"] == "unavailable":
+        reasons.append("socket server unavailable")
+    return reasons
@@ -0,0 +1,164 @@
+"""
+idempotency.py — Idempotency-Key support for write endpoints
+============================================================
+• idempotency_keys table (key PRIMARY KEY) is the durable source of truth
+• A bounded in-process LRU answers most retries without touching the DB
+• Replays return the original status + body; a key reused with a different
+  request body is rejected
+• Keys expire after IDEMPOTENCY_TTL_HOURS and may then be reused; claim()
+  prunes expired rows in small batches every IDEMPOTENCY_PRUNE_INTERVAL s
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+MAX_KEY_LENGTH = 255
+TTL_HOURS      = int(os.getenv("IDEMPOTENCY_TTL_HOURS", 24))
+_LRU_SIZE      = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 1024))
+_PRUNE_EVERY   = float(os.getenv("IDEMPOTENCY_PRUNE_INTERVAL", 300))
+_PRUNE_BATCH   = 1000
+
+_pruned_at: float | None = None
+
+
+class IdempotencyConflict(ValueError):
+    """The key was already used for a different request body."""
+
+
+class _ResponseLRU:
+    """Thread-safe, size-bounded LRU of key → (request_hash, status, body, stored_at)."""
+
+    def __init__(self, size: int):
+        self._size  = size
+        self._items: OrderedDict = OrderedDict()
+        self._lock  = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            if entry[3] <= time.time() - TTL_HOURS * 3600:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: tuple) -> None:
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self._size:
+                self._items.popitem(last=False)
+
+
+_recent = _ResponseLRU(_LRU_SIZE)
+
+
+def request_hash(data) -> str:
+    """Stable fingerprint of a JSON request body."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _checked(entry: tuple, req_hash: str) -> tuple[int, dict]:
+    stored_hash, status, body, _ = entry
+    if stored_hash != req_hash:
+        raise IdempotencyConflict("Idempotency-Key was already used with a different request")
+    return status, body
+
+
+def lookup(cur, key: str, req_hash: str) -> tuple[int, dict] | None:
+    """
+    Return the stored (status, body) for *key*, or None if it is unused.
+    Checks the in-memory LRU first; falls back to one primary-key read.
+    """
+    entry = _recent.get(key)
+    if entry is None:
+        cur.execute(
+            """
+            SELECT request_hash, status_code, response,
+                   EXTRACT(EPOCH FROM created_at) AS stored_at
+            FROM idempotency_keys
+            WHERE key = %s
+              AND response IS NOT NULL
+              AND created_at > NOW() - make_interval(hours => %s)
+            """,
+            (key, TTL_HOURS),
+        )
+        row = cur.fetchone()
+        if row is None:
+            return None
+        entry = (row["request_hash"], row["status_code"],
+                 json.loads(row["response"]), float(row["stored_at"]))
+        _recent.put(key, entry)
+    return _checked(entry, req_hash)
+
+
+def cached(key: str, req_hash: str) -> tuple[int, dict] | None:
+    """LRU-only lookup — no database access at all."""
+    entry = _recent.get(key)
+    return _checked(entry, req_hash) if entry is not None else None
+
+
+def _prune(cur) -> None:
+    """Delete up to _PRUNE_BATCH expired keys, at most once per _PRUNE_EVERY seconds."""
+    global _pruned_at
+    now = time.monotonic()
+    if _pruned_at is not None and now - _pruned_at < _PRUNE_EVERY:
+        return
+    _pruned_at = now
+    cur.execute(
+        """
+        DELETE FROM idempotency_keys
+        WHERE key IN (
+            SELECT key FROM idempotency_keys
+            WHERE created_at <= NOW() - make_interval(hours => %s)
+            ORDER BY created_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        """,
+        (TTL_HOURS, _PRUNE_BATCH),
+    )
+
+
+def claim(cur, key: str, req_hash: str) -> bool:
+    """
+    Reserve *key* inside the caller's transaction.  Returns False when another
+    request already holds it — the unique constraint serialises racing retries.
+    Expired keys are taken over.
+    """
+    _prune(cur)
+    cur.execute(
+        """
+        INSERT INTO idempotency_keys (key, request_hash)
+        VALUES (%s, %s)
+        ON CONFLICT (key) DO UPDATE
+            SET request_hash = EXCLUDED.request_hash,
+                status_code  = NULL,
+                response     = NULL,
+                created_at   = NOW()
+            WHERE idempotency_keys.created_at <= NOW() - make_interval(hours => %s)
+        RETURNING key
+        """,
+        (key, req_hash, TTL_HOURS),
+    )
+    return cur.fetchone() is not None
+
+
+def store(cur, key: str, status: int, body: dict) -> None:
+    """Record the response for a claimed key (same transaction as the write)."""
+    cur.execute(
+        "UPDATE idempotency_keys SET status_code=%s, response=%s WHERE key=%s",
+        (status, json.dumps(body), key),
+    )
+
+
+def remember(key: str, req_hash: str, status: int, body: dict) -> None:
+    """Add a committed response to the LRU — call only after commit."""
+    _recent.put(key, (req_hash, status, body, time.time()))
@@ -3,13 +3,16 @@ init_db.py — Idempotent database bootstrap
 ===========================================
 • Creates tables if they don't exist
 • Adds all performance indexes
-• Seeds default tables + admin user
+• Seeds default tables + admin user + menu catalogue
 • Safe to call on every startup
 """
 
 import logging
 from werkzeug.security import generate_password_hash
 from database import db_conn
+from menu import seed_rows
+from invalidation import seed_generation
+from idempotency import TTL_HOURS as IDEMPOTENCY_TTL_HOURS
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +37,46 @@ CREATE TABLE IF NOT EXISTS orders (
     created_at    TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+CREATE TABLE IF NOT EXISTS menu_items (
+    id        INTEGER        PRIMARY KEY,
+    category  TEXT           NOT NULL,
+    name      TEXT           NOT NULL,
+    price     NUMERIC(10, 2) NOT NULL CHECK (price >= 0),
+    img       TEXT,
+    available BOOLEAN        NOT NULL DEFAULT TRUE,
+    position  INTEGER        NOT NULL DEFAULT 0
+);
+
+-- Content hash of menu_items — lets every worker spot a stale menu snapshot
+CREATE TABLE IF NOT EXISTS menu_version (
+    id      BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version TEXT    NOT NULL
+);
+
+-- Generation stamp of the cached closed stats buckets (invalidation.py)
+CREATE TABLE IF NOT EXISTS stats_generation (
+    id         BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    generation BIGINT  NOT NULL
+);
+
+-- Idempotency-Key → stored response for retried POST /orders
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key          TEXT        PRIMARY KEY,
+    request_hash TEXT        NOT NULL,
+    status_code  INTEGER,
+    response     TEXT,
+    created_at   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Transactional outbox: realtime events + cache keys, drained by outbox.py
+CREATE TABLE IF NOT EXISTS outbox (
+    id         BIGSERIAL   PRIMARY KEY,
+    event      TEXT,
+    payload    TEXT        NOT NULL DEFAULT '{}',
+    cache_keys TEXT[]      NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 CREATE TABLE IF NOT EXISTS admin (
     id       SERIAL PRIMARY KEY,
     username TEXT UNIQUE NOT NULL,
@@ -63,6 +106,10 @@ CREATE INDEX IF NOT EXISTS idx_orders_created_at
 CREATE INDEX IF NOT EXISTS idx_orders_paid_created
     ON orders (status, created_at DESC)
     WHERE status = 'paid';
+
+-- Expired idempotency keys are pruned oldest-first (idempotency.claim)
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created_at
+    ON idempotency_keys (created_at);
 """
 
 
@@ -74,6 +121,14 @@ def initialize_database() -> None:
             cur.execute(_CREATE_TABLES_SQL)
             cur.execute(_CREATE_INDEXES_SQL)
 
+            seed_generation(cur)
+
+            # Expired idempotency keys are never replayed — drop them
+            cur.execute(
+                "DELETE FROM idempotency_keys WHERE created_at < NOW() - make_interval(hours => %s)",
+                (IDEMPOTENCY_TTL_HOURS,),
+            )
+
             # Seed restaurant tables (T1-T6)
             cur.execute("SELECT COUNT(*) AS cnt FROM tables")
             if cur.fetchone()["cnt"] == 0:
@@ -83,6 +138,18 @@ def initialize_database() -> None:
                 )
                 logger.info("Seeded 6 restaurant tables")
 
+            # Seed menu catalogue (ids match the frontend's cart ids)
+            cur.execute("SELECT COUNT(*) AS cnt FROM menu_items")
+            if cur.fetchone()["cnt"] == 0:
+                cur.executemany(
+                    """
+                    INSERT INTO menu_items (id, category, name, price, img, position)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    seed_rows(),
+                )
+                logger.info("Seeded menu catalogue")
+
             # Seed admin user
             cur.execute("SELECT COUNT(*) AS cnt FROM admin")
             if cur.fetchone()["cnt"] == 0:
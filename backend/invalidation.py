@@ -0,0 +1,85 @@
+"""
+invalidation.py — Cache key groups and the stats history generation
+===================================================================
+• Key groups and the orders_imported hook live here so the bulk_io.py CLI
+  can invalidate running servers' caches without importing app.py
+• Closed stats buckets are cached under a generation stamp, so one bump
+  invalidates the whole history without enumerating keys
+• The stamp lives in the stats_generation row, not in the cache —
+  bump_history() advances it inside the write transaction, so every worker
+  sees the bump whatever the cache backend
+• Workers re-read the row at most every STATS_GENERATION_CHECK_INTERVAL
+  seconds, the same way menu.current_snapshot() checks menu_version
+"""
+
+import os
+import time
+
+import outbox
+from database import db_conn
+
+# ── Cache key groups — invalidate by topic, not by hand ───────────────────────
+CACHE_TABLES  = ["all_tables"]
+CACHE_ORDERS  = ["all_orders"]
+CACHE_FINANCE = [
+    "total_income", "stats_daily", "stats_monthly",
+    # Open (still-changing) buckets of /stats/series and /stats/heatmap
+    "series_open_hour", "series_open_day", "series_open_week", "series_open_month",
+    "heatmap_today",
+]
+# Every group derived from orders; closed history goes via bump_history()
+AGGREGATES = (CACHE_TABLES, CACHE_ORDERS, CACHE_FINANCE)
+
+# Seconds a worker trusts its generation before re-reading stats_generation
+GENERATION_CHECK_INTERVAL = float(os.getenv("STATS_GENERATION_CHECK_INTERVAL", 1))
+
+# Clock-based, so a recreated database never reuses a generation still
+# present in a persistent (Redis) cache
+_CLOCK_STAMP = "(EXTRACT(EPOCH FROM clock_timestamp()) * 1000000)::BIGINT"
+
+_generation: int | None = None
+_checked_at = 0.0
+
+
+def seed_generation(cur) -> None:
+    """Create the stats_generation row if it is missing (init_db)."""
+    cur.execute(
+        f"INSERT INTO stats_generation (id, generation) VALUES (TRUE, {_CLOCK_STAMP}) "
+        "ON CONFLICT (id) DO NOTHING"
+    )
+
+
+def bump_history(cur) -> None:
+    """
+    Invalidate every cached closed bucket — call inside the transaction that
+    changes paid history (bulk imports, back-dated payments).
+    """
+    global _generation
+    cur.execute(
+        f"UPDATE stats_generation SET generation = GREATEST(generation + 1, {_CLOCK_STAMP}) WHERE id"
+    )
+    # This worker re-reads on its next lookup (read-your-writes)
+    _generation = None
+
+
+def history_generation(max_age: float | None = None) -> int:
+    """
+    Generation stamp baked into every closed-bucket cache key.  Re-read from
+    the database once the last read is older than *max_age* seconds
+    (default GENERATION_CHECK_INTERVAL).
+    """
+    global _generation, _checked_at
+    max_age = GENERATION_CHECK_INTERVAL if max_age is None else max_age
+    now = time.monotonic()
+    if _generation is None or now - _checked_at >= max_age:
+        with db_conn() as cur:
+            cur.execute("SELECT generation FROM stats_generation WHERE id")
+            _generation = cur.fetchone()["generation"]
+        _checked_at = now
+    return _generation
+
+
+def enqueue_orders_imported(cur, result: dict) -> None:
+    """bulk_io before_commit hook — invalidation and broadcast commit with the import."""
+    bump_history(cur)
+    outbox.enqueue(cur, "orders_imported", {"imported": result["imported"]}, *AGGREGATES)
@@ -0,0 +1,325 @@
+"""
+menu.py — Server-side menu catalogue
+====================================
+• menu_items table is the source of truth (seeded from SEED_MENU)
+• /menu is served from an in-memory snapshot: pre-serialised JSON bytes,
+  a content-hash version, and an id → item price index
+• The version hash doubles as the ETag and the immutable URL segment, so
+  a menu change invalidates every client at once — no TTL involved
+• price_order() validates a cart and recomputes its total in O(items)
+• Items gain responsive image variants when build_assets.py has written
+  its manifest (ASSET_MANIFEST)
+• Every worker holds its own snapshot; the menu_version row (a hash of the
+  menu_items content, written in the same transaction as any menu change)
+  is checked at most every MENU_VERSION_CHECK_INTERVAL seconds and before
+  rejecting a cart, so a stale worker catches up on its own (read-only)
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from decimal import Decimal
+
+from database import db_conn
+
+logger = logging.getLogger(__name__)
+
+ASSET_MANIFEST = Path(os.getenv(
+    "ASSET_MANIFEST",
+    Path(__file__).resolve().parent.parent / "frontend" / "public" / "assets-manifest.json",
+))
+
+# Largest quantity accepted for a single line item
+MAX_QUANTITY = 50
+
+# Seconds a worker trusts its snapshot before re-reading menu_version
+VERSION_CHECK_INTERVAL = float(os.getenv("MENU_VERSION_CHECK_INTERVAL", 1))
+
+# (category, [(id, name, price, img), ...]) — mirrors the original Menu.jsx
+SEED_MENU = [
+    ("HOT SOUP", [
+        (1, "Veg Manchow Soup", 90, "/assets/soups/veg_manchow_soup.jpg"),
+        (2, "Hot & Sour Soup", 90, "/assets/soups/hot_sour_soup.jpg"),
+        (3, "Lemon Coriander Soup", 90, "/assets/soups/lemon_coriander_soup.jpg"),
+    ]),
+    ("STARTERS", [
+        (4, "Veg Manchurian Dry", 110, "/assets/starters/veg_manchurian_dry.jpg"),
+        (5, "Veg Manchurian Gravy", 120, "/assets/starters/veg_manchurian_gravy.jpg"),
+        (6, "Gobi Manchurian", 130, "/assets/starters/gobi_manchurian.jpg"),
+        (7, "Soyabin Chilly", 140, "/assets/starters/soyabin_chilly.jpg"),
+        (8, "Gobi Kentucky", 150, "/assets/starters/gobi_kentucky.jpg"),
+        (9, "Baby Corn Kentucky", 150, "/assets/starters/babycorn_kentucky.jpg"),
+        (10, "Soyabin Kentucky", 120, "/assets/starters/soyabin_kentucky.jpg"),
+        (11, "Mushroom Kentucky", 150, "/assets/starters/mushroom_kentucky.jpg"),
+        (12, "Paneer Kentucky", 160, "/assets/starters/paneer_kentucky.jpg"),
+        (13, "Chinese Bhel", 130, "/assets/starters/chinese_bhel.jpg"),
+    ]),
+    ("FRIES & MOMOS", [
+        (14, "Salted Fries", 100, "/assets/fries/salted_fries.jpg"),
+        (15, "Peri Peri Fries", 120, "/assets/fries/peri_peri_fries.jpg"),
+        (16, "Cheese Fries", 140, "/assets/fries/cheese_fries.jpg"),
+        (17, "Paneer Momos", 90, "/assets/fries/paneer_momos.jpg"),
+        (18, "Mix Veg Momos", 90, "/assets/fries/mix_veg_momos.jpg"),
+        (19, "Chilly Momos", 120, "/assets/fries/chilly_momos.jpg"),
+    ]),
+    ("NOODLES", [
+        (20, "Veg Hakka Noodles", 100, "/assets/noodles/veg_hakka_noodles.jpg"),
+        (21, "Schezwan Noodles", 110, "/assets/noodles/schezwan_noodles.jpg"),
+        (22, "Singapuri Noodles", 130, "/assets/noodles/singapuri_noodles.jpg"),
+        (23, "Paneer Noodles", 130, "/assets/noodles/paneer_noodles.jpg"),
+        (24, "Manchurian Noodles", 130, "/assets/noodles/manchurian_noodles.jpg"),
+        (25, "Paneer Schezwan Noodles", 130, "/assets/noodles/paneer_schezwan_noodles.jpg"),
+        (26, "Schezwan Manchurian Noodles", 130, "/assets/noodles/schezwan_manchurian_noodles.jpg"),
+        (27, "Special Hakka Noodles", 140, "/assets/noodles/special_hakka_noodles.jpg"),
+        (28, "Chilly Garlic Noodles", 150, "/assets/noodles/chilly_garlic_noodles.jpg"),
+        (29, "Triple Schezwan Noodles", 160, "/assets/noodles/triple_schezwan_noodles.jpg"),
+    ]),
+    ("50/50 SPECIAL STATION", [
+        (30, "Veg Barmuda", 160, "/assets/special/veg_barmuda.jpg"),
+        (31, "Paneer Saibo", 160, "/assets/special/paneer_saibo.jpg"),
+        (32, "Paneer Babycorn Hongkong", 160, "/assets/special/paneer_babycorn_hongkong.jpg"),
+        (33, "Paneer Crunchy", 160, "/assets/special/paneer_crunchy.jpg"),
+        (34, "Potato Crunchy", 160, "/assets/special/potato_crunchy.jpg"),
+        (35, "Cheese Corn Ball", 190, "/assets/special/cheese_corn_ball.jpg"),
+        (36, "Veg Crispy", 170, "/assets/special/veg_crispy.jpg"),
+        (37, "Veg Lollipop", 170, "/assets/special/veg_lollipop.jpg"),
+        (38, "Golden Crispy Corn", 160, "/assets/special/golden_crispy_corn.jpg"),
+    ]),
+    ("PANEER", [
+        (39, "Paneer Chilly Dry", 160, "/assets/paneer/paneer_chilly_dry.jpg"),
+        (40, "Paneer Chilly Gravy", 170, "/assets/paneer/paneer_chilly_gravy.jpg"),
+        (41, "Mushroom Chilly", 160, "/assets/paneer/mushroom_chilly.jpg"),
+        (42, "Paneer 65", 170, "/assets/paneer/paneer_65.jpg"),
+        (43, "Paneer Shezwan", 170, "/assets/paneer/paneer_shezwan.jpg"),
+        (44, "Hot Garlic Paneer", 170, "/assets/paneer/hot_garlic_paneer.jpg"),
+        (45, "Mushroom Chingari", 160, "/assets/paneer/mushroom_chingari.jpg"),
+    ]),
+    ("RICE", [
+        (46, "Veg Fried Rice", 100, "/assets/rice/veg_fried_rice.jpg"),
+        (47, "Schezwan Fried Rice", 110, "/assets/rice/schezwan_fried_rice.jpg"),
+        (48, "Singapuri Rice", 130, "/assets/rice/singapuri_rice.jpg"),
+        (49, "Manchurian Rice", 130, "/assets/rice/manchurian_rice.jpg"),
+        (50, "Paneer Fried Rice", 130, "/assets/rice/paneer_fried_rice.jpg"),
+        (51, "Hongkong Rice", 130, "/assets/rice/hongkong_rice.jpg"),
+        (52, "Schezwan Manchurian Rice", 130, "/assets/rice/schezwan_manchurian_rice.jpg"),
+        (53, "Special Fried Rice", 140, "/assets/rice/special_fried_rice.jpg"),
+        (54, "Chilly Garlic Rice", 150, "/assets/rice/chilly_garlic_rice.jpg"),
+        (55, "Triple Schezwan Rice", 160, "/assets/rice/triple_schezwan_rice.jpg"),
+    ]),
+    ("COFFEE", [
+        (56, "Cold Coffee", 70, "/assets/coffee/cold_coffee.jpg"),
+    ]),
+    ("WATER", [
+        (57, "Water Bottle Normal", 20, "/assets/coffee/water_bottle.jpg"),
+        (58, "Water Bottle Cold", 20, "/assets/coffee/water_bottle.jpg"),
+    ]),
+]
+
+_snapshot: dict | None = None
+# menu_version as of the last load — compared instead of the snapshot's own
+# hash, so rows edited behind menu_version's back don't cause a reload loop
+_shared_version: str | None = None
+_checked_at = 0.0
+
+
+class MenuError(ValueError):
+    """A cart that does not match the current menu (unknown item, stale price…)."""
+
+
+def seed_rows() -> list[tuple]:
+    """Flatten SEED_MENU into (id, category, name, price, img, position) rows."""
+    rows, position = [], 0
+    for category, items in SEED_MENU:
+        for item_id, name, price, img in items:
+            rows.append((item_id, category, name, price, img, position))
+            position += 1
+    return rows
+
+
+def _load_image_variants() -> dict:
+    """Original asset URL → {format: [variants]} from the build manifest, if any."""
+    try:
+        images = json.loads(ASSET_MANIFEST.read_text("utf-8")).get("images", {})
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {url: entry["variants"] for url, entry in images.items()}
+
+
+def _content_version(rows: list[dict]) -> str:
+    """
+    Hash of the menu_items rows alone.  The public version also covers image
+    variants, which come from a per-host build manifest — keeping them out of
+    the shared hash stops workers with different manifests from flip-flopping.
+    """
+    content = json.dumps(
+        [[r["id"], r["category"], r["name"], str(r["price"]), r["img"], r["available"]] for r in rows],
+        separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def _build_snapshot(rows: list[dict]) -> dict:
+    categories, by_name, prices = [], {}, {}
+    variants = _load_image_variants()
+    for row in rows:
+        item = {
+            "id":        row["id"],
+            "name":      row["name"],
+            "price":     float(row["price"]),
+            "img":       row["img"],
+            "available": row["available"],
+        }
+        if row["img"] in variants:
+            item["images"] = variants[row["img"]]
+        if row["category"] not in by_name:
+            by_name[row["category"]] = {"category": row["category"], "items": []}
+            categories.append(by_name[row["category"]])
+        by_name[row["category"]]["items"].append(item)
+        prices[row["id"]] = {
+            "name":      row["name"],
+            "price":     Decimal(row["price"]),
+            "img":       row["img"],
+            "available": row["available"],
+        }
+
+    content = json.dumps(categories, separators=(",", ":"), ensure_ascii=False)
+    version = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    body    = json.dumps(
+        {"version": version, "categories": categories},
+        separators=(",", ":"), ensure_ascii=False,
+    ).encode("utf-8")
+    return {
+        "version":         version,
+        "content_version": _content_version(rows),
+        "body":            body,
+        "prices":          prices,
+    }
+
+
+def _read_rows(cur) -> list[dict]:
+    cur.execute(
+        """
+        SELECT id, category, name, price, img, available
+        FROM menu_items
+        ORDER BY position ASC, id ASC
+        """
+    )
+    return cur.fetchall()
+
+
+def publish_snapshot(cur) -> dict:
+    """
+    Build a snapshot inside the caller's transaction and record its content
+    hash in menu_version — call after any menu_items write, before commit.
+    Swap it in with install_snapshot() once the transaction has committed.
+    """
+    # Serialise publishers so a reload can never overwrite a newer hash
+    cur.execute("SELECT version FROM menu_version WHERE id FOR UPDATE")
+    snapshot = _build_snapshot(_read_rows(cur))
+    cur.execute(
+        """
+        INSERT INTO menu_version (id, version) VALUES (TRUE, %s)
+        ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version
+            WHERE menu_version.version <> EXCLUDED.version
+        """,
+        (snapshot["content_version"],),
+    )
+    return snapshot
+
+
+def install_snapshot(snapshot: dict, shared_version: str | None = None) -> dict:
+    """
+    Make *snapshot* this worker's current menu.  *shared_version* is the
+    menu_version it was loaded against (default: its own content hash).
+    """
+    global _snapshot, _shared_version, _checked_at
+    _snapshot, _checked_at = snapshot, time.monotonic()
+    _shared_version = shared_version or snapshot["content_version"]
+    logger.info("Menu snapshot loaded (%d items, version=%s)",
+                len(snapshot["prices"]), snapshot["version"])
+    return snapshot
+
+
+def reload_snapshot() -> dict:
+    """Rebuild the snapshot from the database, publish its hash and swap it in."""
+    with db_conn() as cur:
+        snapshot = publish_snapshot(cur)
+    return install_snapshot(snapshot)
+
+
+def current_snapshot(max_age: float | None = None) -> dict:
+    """
+    Return the in-memory snapshot, reloading it when menu_version shows
+    another worker changed the menu.  The shared version is re-read once
+    the last check is older than *max_age* seconds (default
+    VERSION_CHECK_INTERVAL); pass 0 to check on every call.
+    Catching up is read-only — only writers publish menu_version.
+    """
+    global _checked_at
+    if _snapshot is None:
+        return reload_snapshot()
+
+    max_age = VERSION_CHECK_INTERVAL if max_age is None else max_age
+    now = time.monotonic()
+    if now - _checked_at < max_age:
+        return _snapshot
+
+    with db_conn() as cur:
+        cur.execute("SELECT version FROM menu_version WHERE id")
+        row = cur.fetchone()
+        shared = row["version"] if row else None
+        if shared == _shared_version:
+            _checked_at = now
+            return _snapshot
+        snapshot = _build_snapshot(_read_rows(cur))
+    return install_snapshot(snapshot, shared)
+
+
+def price_order(items, snapshot: dict | None = None) -> tuple[list[dict], Decimal]:
+    """
+    Validate a client cart against the price index of *snapshot* (default:
+    current_snapshot()) and recompute its total.
+    Returns (normalised_items, total).  Duplicate ids are merged.
+    Raises ValueError for malformed input and MenuError for menu mismatches.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError("items must be a non-empty list")
+
+    prices = (snapshot or current_snapshot())["prices"]
+    lines: dict[int, dict] = {}
+    total = Decimal("0")
+
+    for raw in items:
+        if not isinstance(raw, dict):
+            raise ValueError("each item must be an object")
+        item_id, quantity = raw.get("id"), raw.get("quantity")
+        if not isinstance(item_id, int) or isinstance(item_id, bool):
+            raise ValueError("item id must be an integer")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or not 1 <= quantity <= MAX_QUANTITY:
+            raise ValueError(f"quantity must be an integer between 1 and {MAX_QUANTITY}")
+
+        entry = prices.get(item_id)
+        if entry is None:
+            raise MenuError(f"Unknown menu item {item_id}")
+        if not entry["available"]:
+            raise MenuError(f"{entry['name']} is currently unavailable")
+
+        line = lines.get(item_id)
+        if line is None:
+            lines[item_id] = {
+                "id":       item_id,
+                "name":     entry["name"],
+                "price":    float(entry["price"]),
+                "img":      entry["img"],
+                "quantity": quantity,
+            }
+        else:
+            line["quantity"] += quantity
+            if line["quantity"] > MAX_QUANTITY:
+                raise ValueError(f"quantity must be an integer between 1 and {MAX_QUANTITY}")
+        total += entry["price"] * quantity
+
+    return list(lines.values()), total
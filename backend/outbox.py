@@ -0,0 +1,160 @@
+"""
+outbox.py — Transactional outbox for realtime events + cache invalidation
+=========================================================================
+• enqueue() writes the event in the same transaction as the change itself,
+  so a committed change can never lose its broadcast
+• A background green thread drains the outbox in batches: cache keys are
+  de-duplicated per batch, events are emitted in commit order
+• Postgres LISTEN/NOTIFY wakes the dispatcher immediately and is the only
+  thing that triggers a drain; a slow OUTBOX_SWEEP_INTERVAL sweep covers
+  missed notifications, so idle workers leave the pool alone
+• Rows are locked FOR UPDATE SKIP LOCKED and deleted only after dispatch —
+  delivery is at-least-once, and several workers can drain concurrently
+• Cache keys also ride in the NOTIFY payload, which Postgres delivers to
+  every listening worker.  With a process-local cache (SimpleCache) each
+  worker drops the keys from its own cache, and clears it outright after
+  a listener reconnect, since notifications may have been missed.  With a
+  shared cache the draining worker deletes them once.  Process-local
+  caches therefore need OUTBOX_LISTEN=1.
+"""
+
+import os
+import json
+import select
+import logging
+
+import psycopg2
+
+from database import db_conn, DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# ── Configuration (tunable via env) ───────────────────────────────────────────
+_CHANNEL        = "outbox"
+_BATCH_SIZE     = int(os.getenv("OUTBOX_BATCH_SIZE", 200))
+# Drain cadence without LISTEN, and the safety sweep with it
+_POLL_INTERVAL  = float(os.getenv("OUTBOX_POLL_INTERVAL", 1))
+_SWEEP_INTERVAL = float(os.getenv("OUTBOX_SWEEP_INTERVAL", 30))
+_LISTEN         = os.getenv("OUTBOX_LISTEN", "1") == "1"
+# NOTIFY payloads are capped at 8000 bytes — larger key sets flush everything
+_MAX_PAYLOAD    = 7900
+_FLUSH_ALL      = "*"
+
+
+def enqueue(cur, event: str | None, data: dict | None = None, *groups) -> None:
+    """
+    Record a Socket.IO *event* and the cache key *groups* it invalidates,
+    inside the caller's transaction.  NOTIFY is only delivered on commit.
+    """
+    keys = [k for g in groups for k in g]
+    cur.execute(
+        "INSERT INTO outbox (event, payload, cache_keys) VALUES (%s, %s, %s)",
+        (event, json.dumps(data or {}), keys),
+    )
+    notice = json.dumps(keys, separators=(",", ":"))
+    if len(notice.encode("utf-8")) > _MAX_PAYLOAD:
+        notice = json.dumps(_FLUSH_ALL)
+    cur.execute("SELECT pg_notify(%s, %s)", (_CHANNEL, notice))
+
+
+def drain(emit, invalidate=None, limit: int = _BATCH_SIZE) -> int:
+    """
+    Dispatch up to *limit* pending rows; returns how many were handled.
+    *invalidate* is None when each worker applies the keys from NOTIFY itself.
+    """
+    with db_conn() as cur:
+        cur.execute(
+            """
+            SELECT id, event, payload, cache_keys
+            FROM outbox
+            ORDER BY id ASC
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (limit,),
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return 0
+
+        keys = {k for row in rows for k in (row["cache_keys"] or ())}
+        if keys and invalidate is not None:
+            invalidate(keys)
+        for row in rows:
+            if row["event"]:
+                emit(row["event"], json.loads(row["payload"]))
+
+        cur.execute("DELETE FROM outbox WHERE id = ANY(%s)", ([row["id"] for row in rows],))
+    return len(rows)
+
+
+def _listen():
+    """Dedicated autocommit connection (outside the pool) for LISTEN."""
+    conn = psycopg2.connect(DATABASE_URL, keepalives=1, keepalives_idle=30)
+    conn.set_session(autocommit=True)
+    conn.cursor().execute(f"LISTEN {_CHANNEL}")
+    return conn
+
+
+def _apply_notifies(notifies, invalidate, clear) -> None:
+    """Drop the cache keys carried by a batch of NOTIFY payloads from this worker's cache."""
+    keys = set()
+    for notify in notifies:
+        try:
+            payload = json.loads(notify.payload or "[]")
+        except ValueError:
+            payload = _FLUSH_ALL
+        if payload == _FLUSH_ALL:
+            clear()
+            return
+        keys.update(payload)
+    if keys:
+        invalidate(keys)
+
+
+def start_dispatcher(socketio, emit, invalidate, clear, shared_cache: bool) -> None:
+    """
+    Drain the outbox on a background green thread for the life of the process.
+    *shared_cache* says whether one delete reaches every worker (RedisCache)
+    or each worker must invalidate its own cache from the NOTIFY payloads.
+    """
+    if not shared_cache and not _LISTEN:
+        logger.warning("Outbox: process-local cache with OUTBOX_LISTEN=0 — other "
+                       "workers' caches are never invalidated; use a shared cache")
+
+    def _loop():
+        listener = None
+        while True:
+            try:
+                if _LISTEN and listener is None:
+                    listener = _listen()
+                    if not shared_cache:
+                        # Anything committed while we were not listening is lost
+                        clear()
+                if listener is not None:
+                    # Green select under eventlet — wakes on NOTIFY or the sweep timeout
+                    if select.select([listener], [], [], _SWEEP_INTERVAL) != ([], [], []):
+                        listener.poll()
+                        if not listener.notifies:
+                            continue
+                        if not shared_cache:
+                            _apply_notifies(listener.notifies, invalidate, clear)
+                        listener.notifies.clear()
+                else:
+                    socketio.sleep(_POLL_INTERVAL)
+
+                while drain(emit, invalidate if shared_cache else None) == _BATCH_SIZE:
+                    pass
+            except Exception as exc:
+                logger.error("Outbox dispatcher error: %s", exc)
+                if listener is not None:
+                    try:
+                        listener.close()
+                    except Exception:
+                        pass
+                    listener = None
+                socketio.sleep(_POLL_INTERVAL)
+
+    socketio.start_background_task(_loop)
+    logger.info("Outbox dispatcher started (listen=%s, sweep=%.0fs, batch=%d, shared_cache=%s)",
+                _LISTEN, _SWEEP_INTERVAL, _BATCH_SIZE, shared_cache)
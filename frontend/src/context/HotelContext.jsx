@@ -1,4 +1,4 @@
-import { createContext, useContext, useEffect, useState } from "react";
+import { createContext, useContext, useEffect, useRef, useState } from "react";
 
 const HotelContext = createContext();
 
@@ -86,6 +86,12 @@ export const HotelProvider = ({ children }) => {
 
   /* ================= PLACE ORDER ================= */
 
+  // One Idempotency-Key per order — retries of the same order reuse it
+  const orderKeyRef = useRef(null);
+  useEffect(() => {
+    orderKeyRef.current = null;
+  }, [cart, customerInfo, selectedTable]);
+
   const placeOrder = async () => {
     if (!selectedTable || cart.length === 0) return;
 
@@ -101,11 +107,16 @@ export const HotelProvider = ({ children }) => {
       return;
     }
 
+    if (!orderKeyRef.current) {
+      orderKeyRef.current = crypto.randomUUID();
+    }
+
     try {
       const res = await fetch("https://five0-50-chinese-fast-food-6.onrender.com/orders", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          "Idempotency-Key": orderKeyRef.current,
         },
         body: JSON.stringify({
           table_id: selectedTable.id,